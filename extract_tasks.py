@@ -6,16 +6,101 @@
 #   Extracts tasks from notes modified the previous day and adds them to a CalDAV todo list.
 # ==============================================================================
 
-import os, sys, re, json, logging, requests, caldav, uuid, hashlib
-from datetime import datetime, timedelta
+import functools
+import os, sys, re, json, logging, uuid, hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+import threading
+try:
+    from orjson import loads as _json_loads  # C parser, ~2-3x faster
+except ImportError:
+    _json_loads = json.loads
 import yaml
+try:
+    from yaml import CSafeLoader as _YamlLoader  # libyaml, much faster
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
 from pathlib import Path
 from dateutil import parser
-import time
+
+# Heavy dependencies (caldav, requests, dateparser) are imported lazily so
+# runs that find no modified notes don't pay their import cost
+
+@functools.lru_cache(maxsize=1)
+def _caldav():
+    import caldav
+    return caldav
+
+@functools.lru_cache(maxsize=1)
+def _requests():
+    import requests
+    return requests
+
+@functools.lru_cache(maxsize=1)
+def _session():
+    # A shared Session keeps the connection to the Ollama server alive
+    # across calls instead of paying a TCP handshake per note; Sessions
+    # are threadsafe for independent requests
+    session = _requests().Session()
+    session.headers.update({"Content-Type": "application/json"})
+    return session
+
+@functools.lru_cache(maxsize=1)
+def _dateparser():
+    import dateparser
+    return dateparser
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Precompiled patterns (compiled once at import; re's internal cache can
+# be evicted, so hot-path patterns are promoted to module constants)
+_COMPLETED_RE = re.compile(r'COMPLETED:([\dT]+Z?)', re.IGNORECASE)
+
+# Escape iCalendar special characters in a single pass
+_ICAL_ESC = str.maketrans({'\\': '\\\\', ';': '\\;', ',': '\\,', '\n': '\\n'})
+
+# Frontmatter fields that may carry a note's creation date
+_FM_DATE_FIELDS = ('created', 'date', 'creation_date', 'createdAt')
+
+# Stdlib decoder used to recover JSON embedded in surrounding prose
+# (orjson has no raw_decode equivalent)
+_JSON_DECODER = json.JSONDecoder()
+
+# iCalendar VTODO template, formatted in one shot per task; due_block is
+# empty or carries the DUE/X-DATE-PHRASE lines including trailing CRLF
+_VTODO_TEMPLATE = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "PRODID:-//Extract Tasks//EN\r\n"
+    "BEGIN:VTODO\r\n"
+    "UID:{uid}\r\n"
+    "DTSTAMP:{timestamp}\r\n"
+    "SUMMARY:{summary}\r\n"
+    "STATUS:NEEDS-ACTION\r\n"
+    "PRIORITY:{priority}\r\n"
+    "X-TASK-HASH:{task_hash}\r\n"
+    "{due_block}"
+    "END:VTODO\r\n"
+    "END:VCALENDAR\r\n"
+)
+_FRONTMATTER_RE = re.compile(r'^---\n(.*?)\n---\n', re.DOTALL)
+_DATAVIEW_RE = re.compile(r'```dataview(?:js)?\n.*?```', re.DOTALL)
+_TEMPL_RES = [re.compile(p, re.DOTALL) for p in (r'<%.*?%>', r'<<.*?>>', r'\{\{.*?\}\}')]
+_HAS_DIGIT = re.compile(r'\d')
+
+# Words that suggest a phrase might actually contain a date; phrases with
+# no digits and none of these tokens skip the expensive dateparser fallback
+_DATE_TOKENS = frozenset({
+    "mon", "tue", "wed", "thu", "fri", "sat", "sun",
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+    "jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec",
+    "january", "february", "march", "april", "june", "july", "august",
+    "september", "october", "november", "december",
+    "today", "tomorrow", "tonight", "next", "this", "week", "weekend",
+    "month", "year", "day", "days", "morning", "afternoon", "evening", "noon",
+})
+
 # ===== Core Functions =====
 
 def load_config(args):
@@ -42,7 +127,7 @@ def load_config(args):
         if os.path.exists(config_path):
             try:
                 with open(config_path, 'r') as f:
-                    config = {**default_config, **(yaml.safe_load(f) or {})}
+                    config = {**default_config, **(yaml.load(f, Loader=_YamlLoader) or {})}
                 logger.info(f"Loaded configuration from {config_path}")
                 break
             except Exception as e:
@@ -71,60 +156,94 @@ def load_config(args):
     
     return config
 
-def find_recent_notes(input_folder, exclude_folders, start_date, end_date):
+def _scan(folder, exclude_prefixes):
+    """Yield DirEntry objects for all files under folder, skipping excluded subtrees."""
+    try:
+        entries = os.scandir(folder)
+    except OSError as e:
+        logger.debug(f"Error scanning {folder}: {e}")
+        return
+
+    with entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if exclude_prefixes and (entry.path + os.sep).startswith(exclude_prefixes):
+                        continue
+                    yield from _scan(entry.path, exclude_prefixes)
+                else:
+                    yield entry
+            except OSError as e:
+                logger.debug(f"Error scanning {entry.path}: {e}")
+
+def find_recent_notes(input_folder, exclude_folders, start_date, end_date, check_frontmatter_dates=False):
     """Find notes modified between two dates."""
     md_files = []
-    
+
     logger.info(f"Searching for files modified between {start_date.date()} and {end_date.date()}")
-    
-    for root, _, files in os.walk(input_folder):
-        # Skip excluded folders
-        if any(root.startswith(exclude) for exclude in exclude_folders):
+
+    # Normalize exclusions once: expand ~, and anchor on a trailing
+    # separator so excluding "Notes/AI" doesn't also prune "Notes/AI-ideas";
+    # str.startswith accepts the whole tuple natively
+    exclude_prefixes = tuple(
+        os.path.join(os.path.expanduser(exclude), '') for exclude in exclude_folders
+    )
+
+    # Only read frontmatter for files whose timestamps are at least in the
+    # neighbourhood of the range; anything clearly stale can't match
+    fm_window_start = start_date - timedelta(days=365)
+    fm_window_end = end_date + timedelta(days=1)
+
+    for entry in _scan(input_folder, exclude_prefixes):
+        if not entry.name.endswith('.md'):
             continue
-            
-        for file in files:
-            if not file.endswith('.md'):
+
+        file_path = entry.path
+
+        # Check file modification time
+        try:
+            # DirEntry.stat() is cached, so one stat() covers both timestamps;
+            # on macOS st_birthtime is the creation time, elsewhere fall back
+            # to st_ctime
+            st = entry.stat()
+            file_mtime = datetime.fromtimestamp(st.st_mtime)
+            file_ctime = datetime.fromtimestamp(getattr(st, 'st_birthtime', st.st_ctime))
+
+            # Check if timestamps are in range
+            if ((start_date <= file_mtime <= end_date) or
+                (start_date <= file_ctime <= end_date)):
+                md_files.append(file_path)
                 continue
-                
-            file_path = os.path.join(root, file)
-            
-            # Check file modification time
-            try:
-                # Get file timestamps
-                file_mtime = datetime.fromtimestamp(os.path.getmtime(file_path))
-                
-                # Special handling for macOS creation time if needed
-                if sys.platform == 'darwin':
+
+            # Check frontmatter dates, but only when enabled and when the
+            # file's timestamps aren't obviously outside the window —
+            # opening and YAML-parsing every stale note is wasted work
+            if not check_frontmatter_dates:
+                continue
+            if not (fm_window_start <= file_mtime <= fm_window_end or
+                    fm_window_start <= file_ctime <= fm_window_end):
+                continue
+
+            frontmatter = get_frontmatter(file_path)
+            for date_field in _FM_DATE_FIELDS:
+                value = frontmatter.get(date_field)
+                if not value:
+                    continue
+                # Most frontmatter dates are ISO strings; fromisoformat is
+                # roughly an order of magnitude faster than dateutil
+                try:
+                    fm_date = date.fromisoformat(str(value)[:10])
+                except ValueError:
                     try:
-                        import subprocess
-                        result = subprocess.run(['stat', '-f', '%B', file_path], 
-                                               capture_output=True, text=True, check=True)
-                        file_ctime = datetime.fromtimestamp(float(result.stdout.strip()))
-                    except:
-                        file_ctime = datetime.fromtimestamp(os.path.getctime(file_path))
-                else:
-                    file_ctime = datetime.fromtimestamp(os.path.getctime(file_path))
-                
-                # Check if timestamps are in range
-                if ((start_date <= file_mtime <= end_date) or 
-                    (start_date <= file_ctime <= end_date)):
+                        fm_date = parser.parse(str(value)).date()
+                    except Exception:
+                        continue
+                if start_date.date() <= fm_date <= end_date.date():
                     md_files.append(file_path)
-                    continue
-                
-                # Check frontmatter dates
-                frontmatter = get_frontmatter(file_path)
-                for date_field in ['created', 'date', 'creation_date', 'createdAt']:
-                    if date_field in frontmatter and frontmatter[date_field]:
-                        try:
-                            fm_date = parser.parse(str(frontmatter[date_field]))
-                            if start_date.date() <= fm_date.date() <= end_date.date():
-                                md_files.append(file_path)
-                                break
-                        except:
-                            pass
-                            
-            except Exception as e:
-                logger.debug(f"Error checking file dates for {file}: {e}")
+                    break
+
+        except Exception as e:
+            logger.debug(f"Error checking file dates for {entry.name}: {e}")
     
     if md_files:
         logger.info(f"Found {len(md_files)} files modified in the target period")
@@ -135,17 +254,25 @@ def find_recent_notes(input_folder, exclude_folders, start_date, end_date):
         
     return md_files
 
+# Frontmatter sits at the very top of a note, so reading this much is
+# enough to parse it without pulling whole (potentially huge) files in
+_FRONTMATTER_HEAD_BYTES = 8192
+
 def get_frontmatter(file_path):
     """Extract frontmatter from a markdown file."""
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
+            head = f.read(_FRONTMATTER_HEAD_BYTES)
+
+        # Fast path: most notes have no frontmatter at all
+        if not head.startswith('---\n'):
+            return {}
+
         # Parse frontmatter if present
-        frontmatter_match = re.match(r'^---\n(.*?)\n---\n', content, re.DOTALL)
+        frontmatter_match = _FRONTMATTER_RE.match(head)
         if frontmatter_match:
             try:
-                return yaml.safe_load(frontmatter_match.group(1)) or {}
+                return yaml.load(frontmatter_match.group(1), Loader=_YamlLoader) or {}
             except:
                 pass
     except:
@@ -156,71 +283,84 @@ def get_frontmatter(file_path):
 def clean_content(content):
     """Clean note content by removing Obsidian-specific syntax."""
     # Remove dataview blocks
-    content = re.sub(r'```dataview(?:js)?\n.*?```', '', content, re.DOTALL)
-    
+    content = _DATAVIEW_RE.sub('', content)
+
     # Remove inline Obsidian templating code
-    content = re.sub(r'<%.*?%>', '', content, re.DOTALL)
-    content = re.sub(r'<<.*?>>', '', content, re.DOTALL)
-    content = re.sub(r'\{\{.*?\}\}', '', content, re.DOTALL)
-    
+    for templ_re in _TEMPL_RES:
+        content = templ_re.sub('', content)
+
     return content
 
+# All special-case date phrases combined into one alternation so a phrase
+# is scanned once instead of once per pattern; dispatch is on whichever
+# named group matched
+_WEEKDAYS = r'monday|tuesday|wednesday|thursday|friday|saturday|sunday'
+_DATE_PHRASE_RE = re.compile(
+    r'(?P<on_day>(?:on|the)\s+(?:the\s+)?(?P<on_day_num>\d+)(?:st|nd|rd|th)?)'
+    r'|(?P<month_end>end\s+of\s+(?:the\s+)?month)'
+    r'|(?P<next_month>beginning\s+of\s+(?:the\s+)?next\s+month)'
+    r'|(?P<next_wd>next\s+(?P<next_wd_name>' + _WEEKDAYS + r'))'
+    r'|(?P<this_wd>this\s+(?P<this_wd_name>' + _WEEKDAYS + r'))'
+    r'|(?P<tomorrow>\btomorrow\b)'
+    r'|(?P<today>\btoday\b)'
+    r'|(?P<days_from_now>(?P<days_from_now_num>\d+)\s+days?\s+from\s+now)'
+    r'|(?P<next_week>next\s+week)'
+    r'|(?P<in_days>in\s+(?P<in_days_num>\d+)\s+days?)',
+    re.IGNORECASE
+)
+
+# Handlers keyed by the named group above: handler(match, base_date)
+_DATE_PHRASE_HANDLERS = {
+    'on_day': lambda m, base_date: get_future_day(base_date, int(m.group('on_day_num'))),
+    'month_end': lambda m, base_date: get_month_end(base_date),
+    'next_month': lambda m, base_date: get_next_month_start(base_date),
+    'next_wd': lambda m, base_date: get_next_weekday(base_date, m.group('next_wd_name'), True),
+    'this_wd': lambda m, base_date: get_next_weekday(base_date, m.group('this_wd_name'), False),
+    'tomorrow': lambda m, base_date: (base_date + timedelta(days=1)).date(),
+    'today': lambda m, base_date: base_date.date(),
+    'days_from_now': lambda m, base_date: (base_date + timedelta(days=int(m.group('days_from_now_num')))).date(),
+    'next_week': lambda m, base_date: (base_date + timedelta(days=7)).date(),
+    'in_days': lambda m, base_date: (base_date + timedelta(days=int(m.group('in_days_num')))).date(),
+}
+
 def parse_date_phrase(phrase, base_date):
     """Parse natural language date into a datetime.date object."""
     if not phrase or phrase == "null":
         return None
-        
+
+    # LLM output repeats common phrases ("tomorrow", "next monday", ...)
+    # across notes, so the real work is memoized on (phrase, base date)
+    return _parse_date_phrase_cached(phrase.lower().strip(), base_date.date().isoformat())
+
+@functools.lru_cache(maxsize=4096)
+def _parse_date_phrase_cached(phrase, base_date_iso):
+    """Cached worker for parse_date_phrase. Unparseable phrases cache None."""
+    base_date = datetime.combine(date.fromisoformat(base_date_iso), datetime.min.time())
+
     try:
-        import dateparser
-        import calendar
-        
-        logger.debug(f"Parsing date phrase: '{phrase}' relative to {base_date.strftime('%Y-%m-%d')}")
-        
-        # Dictionary of special case handlers
-        handlers = {
-            # Extract day from "on the X" or "the Xth"
-            r'(?:on|the)\s+(?:the\s+)?(\d+)(?:st|nd|rd|th)?': lambda m: get_future_day(base_date, int(m.group(1))),
-            
-            # End of month
-            r'end\s+of\s+(?:the\s+)?month': lambda _: get_month_end(base_date),
-            
-            # Beginning of next month
-            r'beginning\s+of\s+(?:the\s+)?next\s+month': lambda _: get_next_month_start(base_date),
-            
-            # Next weekday
-            r'next\s+(monday|tuesday|wednesday|thursday|friday|saturday|sunday)': 
-                lambda m: get_next_weekday(base_date, m.group(1), True),
-            
-            # This weekday
-            r'this\s+(monday|tuesday|wednesday|thursday|friday|saturday|sunday)': 
-                lambda m: get_next_weekday(base_date, m.group(1), False),
-            
-            # Tomorrow
-            r'\btomorrow\b': lambda _: (base_date + timedelta(days=1)).date(),
-            
-            # Today
-            r'\btoday\b': lambda _: base_date.date(),
-            
-            # X days from now
-            r'(\d+)\s+days?\s+from\s+now': lambda m: (base_date + timedelta(days=int(m.group(1)))).date(),
-            
-            # Next week
-            r'next\s+week': lambda _: (base_date + timedelta(days=7)).date(),
-            
-            # In X days
-            r'in\s+(\d+)\s+days?': lambda m: (base_date + timedelta(days=int(m.group(1)))).date(),
-        }
-        
-        # Try each special case handler
-        for pattern, handler in handlers.items():
-            match = re.search(pattern, phrase, re.IGNORECASE)
-            if match:
-                return handler(match)
-        
-        # Use dateparser as fallback
-        parsed_date = dateparser.parse(
+        logger.debug(f"Parsing date phrase: '{phrase}' relative to {base_date_iso}")
+
+        # Try the special case handlers with a single combined scan
+        match = _DATE_PHRASE_RE.search(phrase)
+        if match:
+            for name, handler in _DATE_PHRASE_HANDLERS.items():
+                if match.group(name) is not None:
+                    return handler(match, base_date)
+
+        # Cheap prefilter: LLMs frequently hallucinate non-date phrases, and
+        # dateparser can take seconds to reject garbage input
+        lower = phrase.lower()
+        if not _HAS_DIGIT.search(lower) and _DATE_TOKENS.isdisjoint(lower.split()):
+            logger.debug(f"Phrase has no date-like tokens, skipping dateparser: '{phrase}'")
+            return None
+
+        # Use dateparser as fallback; English only, and without the slow
+        # freshness parser (relative phrases are handled above)
+        parsed_date = _dateparser().parse(
             phrase,
+            languages=['en'],
             settings={
+                'PARSERS': ['absolute-time', 'relative-time'],
                 'RELATIVE_BASE': base_date,
                 'PREFER_DATES_FROM': 'future'
             }
@@ -316,9 +456,8 @@ def call_ollama(content, system_prompt, config):
     }
     
     try:
-        response = requests.post(
+        response = _session().post(
             f"{server}/api/generate",
-            headers={"Content-Type": "application/json"},
             json=payload,
             timeout=120
         )
@@ -376,39 +515,47 @@ def call_openai(content, system_prompt, config):
         logger.error(f"Error calling OpenAI API: {e}")
         return ""
 
+def _strip_code_fences(text):
+    """Strip a surrounding markdown code fence from LLM output, if any."""
+    cleaned = text.strip()
+    if cleaned.startswith('```'):
+        start_idx = cleaned.find('\n') + 1
+        end_idx = cleaned.rfind('```')
+        if end_idx > start_idx:
+            cleaned = cleaned[start_idx:end_idx].strip()
+        else:
+            cleaned = cleaned[start_idx:].strip()
+    return cleaned
+
 def parse_llm_response(response_text):
     """Parse JSON from LLM response."""
     if not response_text:
         return []
-        
+
     try:
         # Clean up code blocks
-        cleaned = response_text.strip()
-        if cleaned.startswith('```'):
-            start_idx = cleaned.find('\n') + 1
-            end_idx = cleaned.rfind('```')
-            if end_idx > start_idx:
-                cleaned = cleaned[start_idx:end_idx].strip()
-            else:
-                cleaned = cleaned[start_idx:].strip()
-        
+        cleaned = _strip_code_fences(response_text)
+
         # Parse JSON
-        tasks = json.loads(cleaned)
+        tasks = _json_loads(cleaned)
         if not isinstance(tasks, list):
             logger.warning(f"Invalid JSON format (not an array)")
             return []
-            
+
         return tasks
-    except json.JSONDecodeError:
-        # Try extracting just the JSON array
-        try:
-            start = response_text.find('[')
-            end = response_text.rfind(']') + 1
-            if start >= 0 and end > start:
-                return json.loads(response_text[start:end])
-        except:
-            pass
-            
+    except ValueError:
+        # Recover the JSON array embedded in surrounding prose: raw_decode
+        # from the first '[' handles nested arrays and trailing text
+        # correctly, without a second full scan for a matching ']'
+        start = cleaned.find('[')
+        if start >= 0:
+            try:
+                obj, _ = _JSON_DECODER.raw_decode(cleaned, start)
+                if isinstance(obj, list):
+                    return obj
+            except ValueError:
+                pass
+
         logger.error(f"Failed to parse JSON response")
         logger.debug(f"Raw response: {response_text}")
         return []
@@ -432,13 +579,13 @@ def connect_to_caldav(config):
     
     try:
         # Try with SSL verification
-        client = caldav.DAVClient(url=url, username=username, password=password)
+        client = _caldav().DAVClient(url=url, username=username, password=password)
         try:
             client.principal()
             logger.info("Connected to CalDAV server successfully")
         except:
             # Try without SSL verification
-            client = caldav.DAVClient(url=url, username=username, password=password, ssl_verify_cert=False)
+            client = _caldav().DAVClient(url=url, username=username, password=password, ssl_verify_cert=False)
             client.principal()
             logger.info("Connected to CalDAV server with SSL verification disabled")
         
@@ -506,7 +653,7 @@ def get_filtered_tasks(todo_list, config):
                 continue
                 
             # For completed tasks, check completion date
-            completed_match = re.search(r'COMPLETED:([\dT]+Z?)', task.data, re.IGNORECASE)
+            completed_match = _COMPLETED_RE.search(task.data)
             if not completed_match:
                 # If can't determine completion date, be safe and include it
                 filtered_tasks.append(task)
@@ -544,86 +691,92 @@ def get_filtered_tasks(todo_list, config):
     logger.info(f"Task filtering: {active_count} active, {recent_completed_count} recently completed, {older_filtered_count} older completed (filtered out)")
     return filtered_tasks
 
-def task_exists(todo_list, task_text, existing_tasks=None, config=None):
+def build_existing_task_index(existing_tasks):
     """
-    Check if a task already exists in the filtered task list.
-    
+    Build sets of normalized summaries and task hashes from existing tasks.
+
+    Scanning every VTODO's raw iCalendar text once up front turns the
+    per-task duplicate check into two O(1) set lookups instead of a
+    regex pass over every existing task.
+
     Args:
-        todo_list: The CalDAV calendar object
-        task_text: The task text or task data dictionary to check
-        existing_tasks: Pre-filtered list of tasks to check against (optional)
-        config: Configuration dictionary (optional)
-        
+        existing_tasks: List of CalDAV tasks to index
+
     Returns:
-        Boolean indicating if the task exists
+        Tuple of (existing_summaries, existing_hashes) sets
     """
-    # If existing_tasks is not provided, get filtered tasks
-    if existing_tasks is None:
-        try:
-            # Use default values if config is not provided
-            ignore_all_completed = False
-            days_threshold = 7
-            
-            if config is not None:
-                ignore_all_completed = config.get("IGNORE_ALL_COMPLETED_TASKS", False)
-                days_threshold = config.get("COMPLETED_TASK_THRESHOLD_DAYS", 7)
-            
-            # Get filtered tasks based on configuration
-            if ignore_all_completed:
-                # Only get active tasks
-                existing_tasks = todo_list.todos(include_completed=False)
-                logger.info(f"Found {len(existing_tasks)} active tasks (ignoring ALL completed tasks)")
-            else:
-                # Get active + recently completed tasks
-                existing_tasks = get_filtered_tasks(todo_list, {"COMPLETED_TASK_THRESHOLD_DAYS": days_threshold})
-            
-        except Exception as e:
-            logger.error(f"Error getting filtered tasks: {e}")
-            # Fall back to getting only active tasks
-            try:
-                existing_tasks = todo_list.todos(include_completed=False)
-            except Exception as e:
-                logger.error(f"Error getting active tasks: {e}")
-                return False
-    
-    # Normalize the task text
-    if isinstance(task_text, dict):
-        normalized = task_text.get('task', '').lower().strip()
-    else:
-        normalized = task_text.lower().strip()
-    
-    # Generate a hash for comparison
-    task_hash = hashlib.md5(normalized.encode()).hexdigest()
-    
+    existing_summaries = set()
+    existing_hashes = set()
+
     for task in existing_tasks:
         try:
             task_data = task.data
-            if task_data:
-                # Extract summary
-                summary_match = re.search(r'SUMMARY:(.*?)(\r?\n)', task_data, re.IGNORECASE)
-                if summary_match:
-                    existing_summary = summary_match.group(1).strip()
-                    existing_summary = existing_summary.replace('\\,', ',').replace('\\;', ';').replace('\\n', '\n')
-                    
-                    # Compare text or hash
-                    if existing_summary.lower().strip() == normalized or task_hash in task_data:
-                        return True
+            if not task_data:
+                continue
+
+            # Plain line scan: one pass over the text, no regex engine
+            summary = None
+            task_hash = None
+            for line in task_data.splitlines():
+                if summary is None and line.startswith('SUMMARY:'):
+                    summary = line[8:]
+                elif task_hash is None and line.startswith('X-TASK-HASH:'):
+                    task_hash = line[12:].strip()
+                if summary is not None and task_hash is not None:
+                    break
+
+            if summary is not None:
+                summary = summary.strip().replace('\\,', ',').replace('\\;', ';').replace('\\n', '\n')
+                existing_summaries.add(summary.lower())
+            if task_hash:
+                existing_hashes.add(task_hash)
         except:
             continue
-    
-    return False
 
-def add_task_to_caldav(todo_list, task_data, file_mod_date, existing_tasks=None, check_duplicates=True, config=None):
+    return existing_summaries, existing_hashes
+
+def task_exists(normalized, task_hash, existing_summaries, existing_hashes):
+    """
+    Check if a task already exists using the precomputed index sets.
+
+    Args:
+        normalized: Lowercased, stripped task text
+        task_hash: md5 hex digest of the normalized text
+        existing_summaries: Set of normalized summaries of existing tasks
+        existing_hashes: Set of X-TASK-HASH values of existing tasks
+
+    Returns:
+        Boolean indicating if the task exists
+    """
+    return normalized in existing_summaries or task_hash in existing_hashes
+
+def _next_uid():
+    """Draw a random UID, refilling the pool 64 at a time from one urandom read."""
+    if not _UID_POOL:
+        rand = os.urandom(16 * 64)
+        _UID_POOL.extend(
+            str(uuid.UUID(bytes=rand[i:i + 16], version=4))
+            for i in range(0, len(rand), 16)
+        )
+    return _UID_POOL.pop()
+
+_UID_POOL = []
+
+def add_task_to_caldav(todo_list, task_data, file_mod_date, existing_summaries=None, existing_hashes=None, check_duplicates=True):
     """Add a task to the CalDAV todo list."""
     task_text = task_data.get('task', '')
-    if not task_text.strip():
+    if not isinstance(task_text, str) or not task_text.strip():
         return False
-    
+
     date_phrase = task_data.get('date_phrase')
     priority = task_data.get('priority', 'medium')
-    
+
+    # The caller precomputes these; fall back for direct invocations
+    normalized = task_data.get('_norm') or task_text.lower().strip()
+    hash_val = task_data.get('_hash') or hashlib.md5(normalized.encode()).hexdigest()
+
     # Check for duplicate
-    if check_duplicates and task_exists(todo_list, task_text, existing_tasks, config):
+    if check_duplicates and existing_summaries is not None and task_exists(normalized, hash_val, existing_summaries, existing_hashes):
         logger.info(f"Task already exists, skipping: {task_text}")
         return False
     
@@ -636,42 +789,39 @@ def add_task_to_caldav(todo_list, task_data, file_mod_date, existing_tasks=None,
                 logger.debug(f"Parsed '{date_phrase}' to {due_date.isoformat()}")
         
         # Create task
-        uid = str(uuid.uuid4())
-        hash_val = hashlib.md5(task_text.lower().strip().encode()).hexdigest()
-        summary = task_text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+        uid = _next_uid()
+        summary = task_text.translate(_ICAL_ESC)
         timestamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
         
         # Convert priority to iCal format
         ical_priority = {"high": 1, "medium": 5, "low": 9}.get(priority.lower(), 5)
         
-        # Build iCalendar format
-        vcal_parts = [
-            "BEGIN:VCALENDAR",
-            "VERSION:2.0",
-            "PRODID:-//Extract Tasks//EN",
-            "BEGIN:VTODO",
-            f"UID:{uid}",
-            f"DTSTAMP:{timestamp}",
-            f"SUMMARY:{summary}",
-            "STATUS:NEEDS-ACTION",
-            f"PRIORITY:{ical_priority}",
-            f"X-TASK-HASH:{hash_val}"
-        ]
-        
-        # Add due date if available
+        # Build the due-date lines, if any
+        due_block = ""
         if due_date:
-            vcal_parts.append(f"DUE;VALUE=DATE:{due_date.strftime('%Y%m%d')}")
+            due_block = f"DUE;VALUE=DATE:{due_date.strftime('%Y%m%d')}\r\n"
             if date_phrase:
-                # Escape special characters - cannot use backslashes directly in f-strings
-                escaped_phrase = date_phrase.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
-                vcal_parts.append(f"X-DATE-PHRASE:{escaped_phrase}")
-        
-        vcal_parts.extend(["END:VTODO", "END:VCALENDAR"])
-        vcal = "\r\n".join(vcal_parts) + "\r\n"
-        
+                due_block += f"X-DATE-PHRASE:{date_phrase.translate(_ICAL_ESC)}\r\n"
+
+        # Build iCalendar format in a single format pass
+        vcal = _VTODO_TEMPLATE.format(
+            uid=uid,
+            timestamp=timestamp,
+            summary=summary,
+            priority=ical_priority,
+            task_hash=hash_val,
+            due_block=due_block
+        )
+
         # Add to CalDAV
         todo_list.add_todo(vcal)
-        
+
+        # Register in the index so later duplicates in this run are caught
+        if existing_summaries is not None:
+            existing_summaries.add(normalized)
+        if existing_hashes is not None:
+            existing_hashes.add(hash_val)
+
         # Log with details
         log_msg = f"Added task: {task_text}"
         if date_phrase:
@@ -685,107 +835,403 @@ def add_task_to_caldav(todo_list, task_data, file_mod_date, existing_tasks=None,
         logger.error(f"Error adding task to CalDAV: {e}")
         return False
 
+_TASK_CACHE_PATH = os.path.expanduser("~/.cache/extract_tasks/tasks.json")
+
+def _load_task_cache():
+    """Load the parsed-tasks cache mapping content hash -> task list."""
+    try:
+        with open(_TASK_CACHE_PATH, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if isinstance(cache, dict):
+            logger.debug(f"Loaded task cache with {len(cache)} entries")
+            return cache
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Error loading task cache: {e}")
+
+    return {}
+
+def _save_task_cache(cache):
+    """Write the parsed-tasks cache back to disk."""
+    # The cached lists hold the same dicts process_notes annotates with
+    # _norm/_hash scratch keys; drop those so they don't leak into the
+    # on-disk format
+    cleaned = {
+        key: [
+            {k: v for k, v in task.items() if not k.startswith('_')}
+            if isinstance(task, dict) else task
+            for task in tasks
+        ]
+        for key, tasks in cache.items()
+    }
+    try:
+        os.makedirs(os.path.dirname(_TASK_CACHE_PATH), exist_ok=True)
+        with open(_TASK_CACHE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(cleaned, f)
+    except Exception as e:
+        logger.warning(f"Error saving task cache: {e}")
+
+def _make_rate_limiter(delay):
+    """
+    Create a token-bucket style rate limiter for LLM calls.
+
+    Returns an acquire() callable that blocks until a slot is free, then
+    schedules the slot to be released after `delay` seconds. This spaces
+    out requests even when multiple worker threads are running.
+    """
+    semaphore = threading.Semaphore(1)
+
+    def acquire():
+        semaphore.acquire()
+        threading.Timer(delay, semaphore.release).start()
+
+    return acquire
+
+def _prepare_note(file_path):
+    """Read a note and return (note_title, clean_content, file_mod_date)."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    # Get note title from filename or frontmatter
+    note_title = os.path.basename(file_path).replace('.md', '')
+    frontmatter, content_without_frontmatter = extract_frontmatter(content)
+    if 'title' in frontmatter:
+        note_title = frontmatter['title']
+
+    # Clean content
+    clean_note_content = clean_content(content_without_frontmatter)
+    file_mod_date = datetime.fromtimestamp(os.path.getmtime(file_path))
+
+    return note_title, clean_note_content, file_mod_date
+
+def _size_out_of_band(clean_note_content, config):
+    """
+    Return True if a note's cleaned content is too small to contain tasks
+    or too large for the model's context window, using a rough 4-chars-
+    per-token estimate. Saves a multi-second LLM round-trip on junk input.
+    """
+    ntoks_est = len(clean_note_content) // 4
+    if ntoks_est < 20:
+        return True
+    if ntoks_est > config.get("OLLAMA_CONTEXT_WINDOW", 32000) - 2000:
+        return True
+    return False
+
+def extract_for_file(file_path, task_prompt, config, rate_limit=None, task_cache=None):
+    """
+    Extract tasks from a single note file via the LLM.
+
+    Does no CalDAV I/O, so it is safe to run from worker threads.
+
+    Args:
+        file_path: Path to the markdown note
+        task_prompt: System prompt for the LLM
+        config: Configuration dictionary
+        rate_limit: Optional callable that blocks until an LLM call is allowed
+        task_cache: Optional dict mapping content hash -> cached task list
+
+    Returns:
+        Tuple of (tasks, file_mod_date) where tasks is a list of task dicts
+    """
+    filename = os.path.basename(file_path)
+
+    note_title, clean_note_content, file_mod_date = _prepare_note(file_path)
+
+    # Don't bother the LLM with near-empty or context-overflowing notes
+    if _size_out_of_band(clean_note_content, config):
+        logger.info(f"Skipping {filename}: content size out of band for LLM")
+        return [], file_mod_date
+
+    # Skip the LLM entirely if we already extracted tasks for this exact
+    # content on a previous run (e.g. only frontmatter/mtime changed)
+    cache_key = None
+    if task_cache is not None:
+        cache_key = hashlib.sha1(clean_note_content.encode()).hexdigest()
+        cached = task_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Using cached tasks for {filename} ({len(cached)} tasks)")
+            return cached, file_mod_date
+
+    # Prepare content for LLM
+    content_for_llm = f"# {note_title}\n\n{clean_note_content}"
+
+    # Extract tasks
+    logger.info(f"Sending content of {filename} to {config.get('LLM_PROVIDER')} for task extraction")
+    if rate_limit:
+        rate_limit()
+    llm_response = call_llm(content_for_llm, task_prompt, config)
+
+    if not llm_response:
+        logger.info(f"No response from LLM for {filename}")
+        return [], file_mod_date
+
+    # Parse tasks
+    tasks = parse_llm_response(llm_response)
+
+    # Cache the result (including empty lists, so repeated empty notes
+    # also skip the LLM)
+    if cache_key is not None:
+        task_cache[cache_key] = tasks
+
+    return tasks, file_mod_date
+
+# Prepended to the task prompt when several notes share one LLM request
+_BATCH_PROMPT_HEADER = (
+    "You will receive several notes, each preceded by a delimiter line of the "
+    "form ===NOTE:<id>===. Return a single JSON object mapping each note id "
+    "to the JSON array of tasks extracted from that note, following the task "
+    "format described below.\n\n"
+)
+
+def _parse_llm_batch_response(response_text):
+    """
+    Parse the JSON object mapping note id to task list from a batched
+    LLM response. Returns None if the response cannot be parsed.
+    """
+    if not response_text:
+        return None
+
+    cleaned = _strip_code_fences(response_text)
+
+    try:
+        obj = _json_loads(cleaned)
+    except ValueError:
+        # Recover the JSON object embedded in surrounding prose
+        start = cleaned.find('{')
+        if start < 0:
+            return None
+        try:
+            obj, _ = _JSON_DECODER.raw_decode(cleaned, start)
+        except ValueError:
+            return None
+
+    if not isinstance(obj, dict):
+        return None
+
+    return {str(note_id): tasks for note_id, tasks in obj.items()}
+
+def extract_for_batch(file_paths, task_prompt, config, rate_limit=None, task_cache=None):
+    """
+    Extract tasks from several note files with a single LLM request.
+
+    Batching amortizes the fixed per-request cost (system prompt tokens,
+    network round-trip) across notes. Cached notes are answered without
+    hitting the LLM, and a response that cannot be parsed as the expected
+    id->tasks object falls back to per-file extraction.
+
+    Args:
+        file_paths: List of markdown note paths to process together
+        task_prompt: System prompt for the LLM
+        config: Configuration dictionary
+        rate_limit: Optional callable that blocks until an LLM call is allowed
+        task_cache: Optional dict mapping content hash -> cached task list
+
+    Returns:
+        Dict mapping file_path -> (tasks, file_mod_date); files that could
+        not be read are omitted
+    """
+    results = {}
+    pending = []  # (note_id, file_path, content_for_llm, cache_key, file_mod_date)
+
+    for file_path in file_paths:
+        filename = os.path.basename(file_path)
+        try:
+            note_title, clean_note_content, file_mod_date = _prepare_note(file_path)
+        except Exception as e:
+            logger.error(f"Error reading {filename}: {e}")
+            continue
+
+        # Don't bother the LLM with near-empty or context-overflowing notes
+        if _size_out_of_band(clean_note_content, config):
+            logger.info(f"Skipping {filename}: content size out of band for LLM")
+            results[file_path] = ([], file_mod_date)
+            continue
+
+        cache_key = None
+        if task_cache is not None:
+            cache_key = hashlib.sha1(clean_note_content.encode()).hexdigest()
+            cached = task_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Using cached tasks for {filename} ({len(cached)} tasks)")
+                results[file_path] = (cached, file_mod_date)
+                continue
+
+        note_id = str(len(pending))
+        content_for_llm = f"===NOTE:{note_id}===\n# {note_title}\n\n{clean_note_content}\n"
+        pending.append((note_id, file_path, content_for_llm, cache_key, file_mod_date))
+
+    if not pending:
+        return results
+
+    # A single remaining note doesn't need the batch envelope
+    if len(pending) == 1:
+        file_path = pending[0][1]
+        try:
+            results[file_path] = extract_for_file(file_path, task_prompt, config, rate_limit, task_cache)
+        except Exception as e:
+            logger.error(f"Error processing {os.path.basename(file_path)}: {e}")
+        return results
+
+    logger.info(f"Sending batch of {len(pending)} notes to {config.get('LLM_PROVIDER')} for task extraction")
+    if rate_limit:
+        rate_limit()
+    llm_response = call_llm(
+        "\n".join(content for _, _, content, _, _ in pending),
+        _BATCH_PROMPT_HEADER + task_prompt,
+        config
+    )
+
+    tasks_by_id = _parse_llm_batch_response(llm_response)
+    if tasks_by_id is None:
+        logger.warning("Could not parse batched LLM response, falling back to per-file extraction")
+        for _, file_path, _, _, _ in pending:
+            try:
+                results[file_path] = extract_for_file(file_path, task_prompt, config, rate_limit, task_cache)
+            except Exception as e:
+                logger.error(f"Error processing {os.path.basename(file_path)}: {e}")
+        return results
+
+    # A note id the model dropped (or answered with a non-list) is a
+    # partial failure, not "no tasks": re-extract those files per-file
+    # rather than caching a fabricated empty result
+    retry = []
+    for note_id, file_path, _, cache_key, file_mod_date in pending:
+        tasks = tasks_by_id.get(note_id)
+        if not isinstance(tasks, list):
+            logger.warning(f"Batch response missing or invalid for note {note_id} ({os.path.basename(file_path)}), re-extracting per-file")
+            retry.append(file_path)
+            continue
+        if cache_key is not None:
+            task_cache[cache_key] = tasks
+        results[file_path] = (tasks, file_mod_date)
+
+    for file_path in retry:
+        try:
+            results[file_path] = extract_for_file(file_path, task_prompt, config, rate_limit, task_cache)
+        except Exception as e:
+            logger.error(f"Error processing {os.path.basename(file_path)}: {e}")
+
+    return results
+
 def process_notes(note_files, task_prompt, config):
     """Process notes and extract tasks."""
     # Connect to CalDAV
     client, todo_list = connect_to_caldav(config)
     if not client or not todo_list:
         return 0, 0, []
-    
-    # Get existing tasks if needed
-    existing_tasks = None
+
+    # Index existing tasks for duplicate checking if needed
+    existing_summaries = None
+    existing_hashes = None
     if config.get("CHECK_EXISTING_TASKS", True):
         try:
             # Get filtered tasks based on configuration
             existing_tasks = get_filtered_tasks(todo_list, config)
+            existing_summaries, existing_hashes = build_existing_task_index(existing_tasks)
         except Exception as e:
             logger.error(f"Error getting existing tasks: {e}")
             config["CHECK_EXISTING_TASKS"] = False
-    
+
     tasks_added = 0
     files_with_errors = 0
     all_tasks = []
-    
-    # Process each file
-    for index, file_path in enumerate(note_files):
-        filename = os.path.basename(file_path)
-        progress = f"[{index+1}/{len(note_files)}]"
-        logger.info(f"{progress} Processing file: {filename}")
-        
-        try:
-            # Read and prepare content
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Get note title from filename or frontmatter
-            note_title = os.path.basename(file_path).replace('.md', '')
-            frontmatter, content_without_frontmatter = extract_frontmatter(content)
-            if 'title' in frontmatter:
-                note_title = frontmatter['title']
-            
-            # Clean content
-            clean_note_content = clean_content(content_without_frontmatter)
-            file_mod_date = datetime.fromtimestamp(os.path.getmtime(file_path))
-            
-            # Prepare content for LLM
-            content_for_llm = f"# {note_title}\n\n{clean_note_content}"
-            
-            # Extract tasks
-            logger.info(f"{progress} Sending content to {config.get('LLM_PROVIDER')} for task extraction")
-            llm_response = call_llm(content_for_llm, task_prompt, config)
-            
-            if not llm_response:
-                logger.info(f"{progress} No response from LLM for {filename}")
-                continue
-            
-            # Parse tasks
-            tasks = parse_llm_response(llm_response)
-            
-            if not tasks:
-                logger.info(f"{progress} No tasks extracted from {filename}")
+
+    # Space out requests for OpenAI rate-limit friendliness
+    rate_limit = None
+    if config.get("LLM_PROVIDER") == "openai" and config.get("DELAY", 0) > 0:
+        rate_limit = _make_rate_limiter(config.get("DELAY"))
+
+    # Load the parsed-tasks cache so unchanged notes skip the LLM
+    task_cache = _load_task_cache() if config.get("LLM_CACHE", True) else None
+
+    # Group notes into batches to amortize per-request LLM overhead
+    batch_size = max(1, config.get("LLM_BATCH_SIZE", 4))
+    batches = [note_files[i:i + batch_size] for i in range(0, len(note_files), batch_size)]
+
+    # Run LLM extraction in parallel (I/O-bound), but do all CalDAV writes
+    # serially on this thread since the caldav client is not threadsafe
+    max_workers = config.get("LLM_CONCURRENCY", 4)
+    completed = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(extract_for_batch, batch, task_prompt, config, rate_limit, task_cache): batch
+            for batch in batches
+        }
+
+        for future in as_completed(futures):
+            batch = futures[future]
+
+            try:
+                results = future.result()
+            except Exception as e:
+                logger.error(f"Error processing batch of {len(batch)} files: {e}")
+                files_with_errors += len(batch)
+                completed += len(batch)
                 continue
-                
-            logger.info(f"{progress} Extracted {len(tasks)} tasks from {filename}")
-            
-            # Add tasks to CalDAV
-            for task_data in tasks:
-                if not isinstance(task_data, dict) or 'task' not in task_data:
-                    logger.warning(f"Invalid task format: {task_data}")
+
+            # Files missing from the results could not be read
+            files_with_errors += len(batch) - len(results)
+            completed += len(batch) - len(results)
+
+            for file_path, (tasks, file_mod_date) in results.items():
+                filename = os.path.basename(file_path)
+                completed += 1
+                progress = f"[{completed}/{len(note_files)}]"
+
+                if not tasks:
+                    logger.info(f"{progress} No tasks extracted from {filename}")
                     continue
-                    
-                # Pass config to add_task_to_caldav
-                if add_task_to_caldav(todo_list, task_data, file_mod_date, existing_tasks, config.get("CHECK_EXISTING_TASKS", True), config):
-                    tasks_added += 1
-                    task_info = {
-                        'text': task_data.get('task', ''),
-                        'date_phrase': task_data.get('date_phrase'),
-                        'priority': task_data.get('priority', 'medium')
-                    }
-                    all_tasks.append(task_info)
-            
-            # Add delay between files if using OpenAI
-            if config.get("LLM_PROVIDER") == "openai" and index < len(note_files) - 1 and config.get("DELAY", 0) > 0:
-                time.sleep(config.get("DELAY"))
-                
-        except Exception as e:
-            logger.error(f"{progress} Error processing {filename}: {e}")
-            files_with_errors += 1
-    
+
+                logger.info(f"{progress} Extracted {len(tasks)} tasks from {filename}")
+
+                # Add tasks to CalDAV
+                for task_data in tasks:
+                    if not isinstance(task_data, dict) or not isinstance(task_data.get('task'), str):
+                        logger.warning(f"Invalid task format: {task_data}")
+                        continue
+
+                    try:
+                        # Normalize and hash once per task; add_task_to_caldav
+                        # and the duplicate check both read these
+                        norm = task_data['task'].lower().strip()
+                        task_data['_norm'] = norm
+                        task_data['_hash'] = hashlib.md5(norm.encode()).hexdigest()
+
+                        if add_task_to_caldav(todo_list, task_data, file_mod_date, existing_summaries, existing_hashes, config.get("CHECK_EXISTING_TASKS", True)):
+                            tasks_added += 1
+                            task_info = {
+                                'text': task_data.get('task', ''),
+                                'date_phrase': task_data.get('date_phrase'),
+                                'priority': task_data.get('priority', 'medium')
+                            }
+                            all_tasks.append(task_info)
+                    except Exception as e:
+                        logger.error(f"Error adding task from {filename}: {e}")
+
+    if task_cache is not None:
+        _save_task_cache(task_cache)
+
     return tasks_added, files_with_errors, all_tasks
 
 def extract_frontmatter(content):
     """Extract frontmatter and content separately."""
-    frontmatter_match = re.match(r'^---\n(.*?)\n---\n', content, re.DOTALL)
-    
+    # Fast path: most notes have no frontmatter at all
+    if not content.startswith('---\n'):
+        return {}, content
+
+    frontmatter_match = _FRONTMATTER_RE.match(content)
+
     if frontmatter_match:
         frontmatter_content = frontmatter_match.group(1)
         rest_content = content[frontmatter_match.end():]
         try:
-            frontmatter = yaml.safe_load(frontmatter_content) or {}
+            frontmatter = yaml.load(frontmatter_content, Loader=_YamlLoader) or {}
             return frontmatter, rest_content
         except yaml.YAMLError:
             pass
-    
+
     return {}, content
 
 def main():
@@ -879,7 +1325,8 @@ def main():
         config.get("INPUT_FOLDER"),
         config.get("EXCLUDE_FOLDERS", []),
         start_boundary,
-        end_boundary
+        end_boundary,
+        config.get("CHECK_FRONTMATTER_DATES", False)
     )
     
     if not md_files: